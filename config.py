@@ -23,13 +23,22 @@ class Config:
         self.HOST = os.environ.get('TRANSCRIPTION_HOST', 'localhost')
         self.PORT = int(os.environ.get('TRANSCRIPTION_PORT', '8080'))
         self.DEBUG = os.environ.get('TRANSCRIPTION_DEBUG', 'False').lower() == 'true'
+        self.LOG_LEVEL = os.environ.get('TRANSCRIPTION_LOG_LEVEL', 'INFO').upper()
         
         self.MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500mb
         self.SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', 'dev-key-change-in-production')
         
         # whisper model configuration
         self.WHISPER_MODEL = os.environ.get('WHISPER_MODEL', 'medium.en')
+        self.WHISPER_DEVICE = os.environ.get('WHISPER_DEVICE', 'auto').lower()
+        # empty picks int8_float16 on cuda and int8 on cpu
+        self.WHISPER_COMPUTE_TYPE = os.environ.get('WHISPER_COMPUTE_TYPE', '')
         self.MAX_WORKERS = int(os.environ.get('TRANSCRIPTION_MAX_WORKERS', '3'))
+        self.DOWNLOAD_WORKERS = int(os.environ.get('TRANSCRIPTION_DOWNLOAD_WORKERS', '4'))
+        # concurrent ffmpeg encodes, each libopus encode keeps about two cores busy
+        self.CONVERSION_WORKERS = int(os.environ.get('TRANSCRIPTION_CONVERSION_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+        # chunks per batched forward pass, 1 disables batched inference
+        self.WHISPER_BATCH_SIZE = int(os.environ.get('WHISPER_BATCH_SIZE', '8'))
         
         # gpu memory management
         self.AGGRESSIVE_GPU_CLEANUP = os.environ.get('AGGRESSIVE_GPU_CLEANUP', 'True').lower() == 'true'
@@ -2,13 +2,14 @@ import time
 import os
 # STATS_MONITORING_IMPLEMENTATION - comment out these 2 lines to disable stats
 # from wrappers.transcription_statistics import start_stats_monitoring, stop_stats_monitoring
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 import torch
 import gc
 import threading
 from datetime import datetime
+from concurrent.futures import wait
 from pathlib import Path
-from wrappers.media_manager import conversion_queue, TEST_async_convert_all_media
+from wrappers.media_manager import conversion_queue, TEST_async_convert_all_media, stop_conversions
 from wrappers.queue_manager import QueueStatus
 from wrappers.db.db_manager import TranscriptionDB
 
@@ -17,36 +18,46 @@ class TranscriptionOrchestrator:
         self.model = None
         from config import config
         self.model_id = config.WHISPER_MODEL
+        self.device = config.WHISPER_DEVICE
+        self.compute_type = config.WHISPER_COMPUTE_TYPE
         self.temp_dir = config.TEMP_DIR
         self.whisper_cache_dir = config.WHISPER_CACHE_DIR
+        self.batch_size = config.WHISPER_BATCH_SIZE
+        self.aggressive_gpu_cleanup = config.AGGRESSIVE_GPU_CLEANUP
         self.max_workers = 3
         self.model_pool = []
         self.pool_lock = threading.Lock()
         self.worker_threads = []
         self.db = TranscriptionDB()
         
-    def create_whisper_model(self) -> WhisperModel:
-        """create a new faster-whisper model instance on gpu"""
+    def create_whisper_model(self):
+        """create a new faster-whisper model instance, batched when batch_size > 1"""
         print("loading faster-whisper model...")
-        if not torch.cuda.is_available():
-            print("warning: torch reports no cuda device, still forcing cuda for debugging")
-        device = "cuda"
-        compute_type = "float16"
+        device = self.device
+        if device == "auto":
+            if torch.cuda.is_available():
+                device = "cuda"
+            else:
+                print("warning: torch reports no cuda device, falling back to cpu int8")
+                device = "cpu"
+        compute_type = self.compute_type or ("int8_float16" if device == "cuda" else "int8")
         model = WhisperModel(self.model_id, device=device, compute_type=compute_type, download_root=str(self.whisper_cache_dir))
         print(f"faster-whisper model loaded: {self.model_id} on {device} ({compute_type})")
+        if self.batch_size > 1:
+            model = BatchedInferencePipeline(model=model)
+            print(f"using batched inference with batch size {self.batch_size}")
         return model
     
-    def transcribe_file(self, item, model: WhisperModel):
+    def transcribe_file(self, item, model):
         """transcribe a single file with provided model and save output"""
         try:
             item.update_status(QueueStatus.TRANSCRIBING)
             print(f"transcribing {item.file_path}...")
             
-            segments, info = model.transcribe(
-                item.file_path,
-                vad_filter=True,
-                beam_size=5,
-            )
+            transcribe_options = {"vad_filter": True, "beam_size": 5}
+            if self.batch_size > 1:
+                transcribe_options["batch_size"] = self.batch_size
+            segments, info = model.transcribe(item.file_path, **transcribe_options)
             
             transcription_text = "".join(s.text for s in segments)
             
@@ -57,16 +68,27 @@ class TranscriptionOrchestrator:
             self.db.add_transcription(filename, transcription_text, item.id, youtube_url)
             item.update_status(QueueStatus.COMPLETED)
             
-            if os.path.exists(item.file_path):
+            try:
                 os.remove(item.file_path)
-                print(f"cleaned up {item.file_path}") 
+                print(f"cleaned up {item.file_path}")
+            except FileNotFoundError:
+                pass
             
         except Exception as e:
             print(f"error transcribing {item.file_path}: {e}")
             item.mark_failed(str(e))
     
+    def warm_model_pool(self):
+        """load one model up front so the first queued item skips the load"""
+        with self.pool_lock:
+            if not self.model_pool:
+                self.model_pool.append({"model": self.create_whisper_model(), "busy": False})
+    
     def run_orchestration(self):
         """main orchestration loop - process up to max_workers files concurrently"""
+        # resident models are only worth preloading when idle cleanup won't free them
+        if not self.aggressive_gpu_cleanup:
+            self.warm_model_pool()
         
         active_statuses = {
             QueueStatus.QUEUED,
@@ -119,11 +141,13 @@ class TranscriptionOrchestrator:
                     self.worker_threads.append(t)
                     available_slots -= 1
 
-            any_active = any(
-                conversion_queue.get_all_items_by_status(s) for s in active_statuses
-            ) or bool(self.worker_threads)
-            if not any_active and self.model_pool:
-                self.cleanup()
+            # with aggressive cleanup off, loaded models stay resident between bursts
+            if self.aggressive_gpu_cleanup and self.model_pool:
+                any_active = any(
+                    conversion_queue.count(s) for s in active_statuses
+                ) or bool(self.worker_threads)
+                if not any_active:
+                    self.cleanup()
             time.sleep(0.5)
 
     def cleanup(self):
@@ -169,18 +193,18 @@ def trigger_media_processing():
     """trigger conversion of all media files found in .temp directory"""
     print("triggering async media processing...")
     
-    media_threads = TEST_async_convert_all_media()
+    media_futures = TEST_async_convert_all_media()
     
     print("media processing started in background")
     print(f"initial queue status: {conversion_queue.get_all_items()}")
     
-    return media_threads
+    return media_futures
 
 if __name__ == "__main__":
     # STATS_MONITORING_IMPLEMENTATION - comment out this line to disable stats
     # start_stats_monitoring("orchestrator_dual_worker")
     
-    media_threads = trigger_media_processing()
+    media_futures = trigger_media_processing()
     
     orchestrator = TranscriptionOrchestrator()
     try:
@@ -189,10 +213,9 @@ if __name__ == "__main__":
         print("\nstopping orchestrator...")
         orchestrator.cleanup()
         
-        print("waiting for media processing threads to complete...")
-        for thread in media_threads:
-            if thread.is_alive():
-                thread.join(timeout=5)
+        print("waiting for media processing to complete...")
+        stop_conversions()
+        wait(media_futures, timeout=5)
     
     # STATS_MONITORING_IMPLEMENTATION - comment out this line to disable stats
     # stop_stats_monitoring()
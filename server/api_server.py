@@ -1,20 +1,22 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask.helpers import make_response
 import os
-import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from werkzeug.utils import secure_filename
 import sys
 import datetime
-import pytz
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from wrappers.media_manager import conversion_queue, download_audio, convert_to_audio, get_video_title
+from wrappers.media_manager import conversion_queue, conversion_executor, download_audio, convert_to_audio, get_video_title, get_queued_item
 from wrappers.queue_manager import QueueStatus
-from wrappers.db.db_manager import TranscriptionDB
+from wrappers.db.db_manager import TranscriptionDB, PST
 from config import config
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__, static_folder='static', static_url_path='')
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
 app.config['UPLOAD_FOLDER'] = config.get_temp_dir_str()
@@ -22,22 +24,26 @@ app.config['SECRET_KEY'] = config.SECRET_KEY
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 db = TranscriptionDB(config.get_db_path())
+download_executor = ThreadPoolExecutor(max_workers=config.DOWNLOAD_WORKERS, thread_name_prefix="download")
 
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm', 'mp3', 'wav', 'ogg', 'm4a'}
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1mb chunks when spooling uploads to disk
+
+# item id -> (updated_at, payload) for /api/queue/items, rebuilt on each poll
+_queue_item_payloads = {}
 
 def local_to_utc_isoformat(dt):
     """convert naive local datetime to utc iso format"""
     if dt is None:
         return None
     # assume dt is in local timezone, convert to utc
-    local_tz = pytz.timezone('America/Los_Angeles')  # your timezone
     if dt.tzinfo is None:
         # make timezone-aware in local timezone
-        dt_local = local_tz.localize(dt)
+        dt_local = dt.replace(tzinfo=PST)
     else:
         dt_local = dt
     # convert to utc and return iso format
-    return dt_local.astimezone(pytz.UTC).isoformat()
+    return dt_local.astimezone(datetime.timezone.utc).isoformat()
 
 def allowed_file(filename):
     """check if file has allowed extension"""
@@ -85,9 +91,9 @@ def add_link_to_queue():
         if not url:
             return jsonify({'error': 'url cannot be empty'}), 400
         
-        if db.youtube_url_exists(url):
-            existing_info = db.get_youtube_url_info(url)
-            video_title = existing_info.get('video_title') if existing_info else 'unknown'
+        existing_info = db.get_youtube_url_info(url)
+        if existing_info:
+            video_title = existing_info.get('video_title') or 'unknown'
             
             item_id = conversion_queue.add_item(url, url, video_title)
             item = conversion_queue.get_item(item_id)
@@ -112,13 +118,16 @@ def add_link_to_queue():
         item_id = conversion_queue.add_item(url, url, video_title)
         
         def download_task():
+            item = get_queued_item(item_id)
+            if not item:
+                print(f"item {item_id} was cancelled or removed before download")
+                return
             try:
-                download_audio(url, existing_item=conversion_queue.get_item(item_id))
+                download_audio(url, existing_item=item)
             except Exception as e:
                 print(f"download error for {url}: {e}")
         
-        thread = threading.Thread(target=download_task, daemon=True)
-        thread.start()
+        download_executor.submit(download_task)
         
         return jsonify({
             'success': True,
@@ -146,16 +155,22 @@ def upload_file_to_queue():
         
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        file.save(file_path, buffer_size=UPLOAD_BUFFER_SIZE)
+        
+        # queue the item now so it is listed while waiting for a conversion worker
+        item_id = conversion_queue.add_item(file_path)
         
         def convert_task():
+            item = get_queued_item(item_id)
+            if not item:
+                print(f"item {item_id} was cancelled or removed before conversion")
+                return
             try:
-                convert_to_audio(file_path)
+                convert_to_audio(file_path, existing_item=item)
             except Exception as e:
                 print(f"conversion error for {file_path}: {e}")
         
-        thread = threading.Thread(target=convert_task, daemon=True)
-        thread.start()
+        conversion_executor.submit(convert_task)
         
         return jsonify({
             'success': True,
@@ -187,20 +202,32 @@ def get_queue_status():
 def get_queue_items():
     """get all queue items with details"""
     try:
+        global _queue_item_payloads
         items = conversion_queue.get_all_items()
         
+        # every queue mutation bumps updated_at, so unchanged items reuse their payload
+        payloads = {}
         items_data = []
         for item in items:
-            items_data.append({
-                'id': item.id,
-                'file_path': str(item.file_path) if item.file_path else None,
-                'url': getattr(item, 'url', None),
-                'video_title': getattr(item, 'video_title', None),
-                'status': item.status.value,
-                'created_at': local_to_utc_isoformat(item.created_at),
-                'updated_at': local_to_utc_isoformat(item.updated_at),
-                'error_message': item.error_message
-            })
+            # read once before building the payload; update_status bumps updated_at last
+            updated_at = item.updated_at
+            cached = _queue_item_payloads.get(item.id)
+            if cached and cached[0] == updated_at:
+                item_data = cached[1]
+            else:
+                item_data = {
+                    'id': item.id,
+                    'file_path': str(item.file_path) if item.file_path else None,
+                    'url': getattr(item, 'url', None),
+                    'video_title': getattr(item, 'video_title', None),
+                    'status': item.status.value,
+                    'created_at': local_to_utc_isoformat(item.created_at),
+                    'updated_at': local_to_utc_isoformat(updated_at),
+                    'error_message': item.error_message
+                }
+            payloads[item.id] = (updated_at, item_data)
+            items_data.append(item_data)
+        _queue_item_payloads = payloads
         
         return jsonify({
             'items': items_data,
@@ -298,7 +325,7 @@ def get_transcriptions():
 @app.route('/api/transcriptions/<int:transcription_id>', methods=['GET'])
 def get_transcription_content(transcription_id):
     try:
-        with db.get_connection() as conn:
+        with db.get_read_connection() as conn:
             cursor = conn.execute("""
             SELECT filename, content FROM transcriptions WHERE id = ?;""", (transcription_id,))
             row = cursor.fetchone()
@@ -391,30 +418,30 @@ def get_pending_duplicates():
 def resolve_duplicate(item_id):
     """resolve a duplicate by either overwriting or cancelling"""
     try:
-        print(f"resolve_duplicate called: item_id={item_id}")
+        logger.debug("resolve_duplicate called: item_id=%s", item_id)
         data = request.get_json()
-        print(f"request data: {data}")
+        logger.debug("request data: %s", data)
         
         if not data or 'action' not in data:
             return jsonify({'error': 'action field required (overwrite/cancel)'}), 400
         
         action = data['action']
-        print(f"action: {action}")
+        logger.debug("action: %s", action)
         
         if action not in ['overwrite', 'cancel']:
             return jsonify({'error': 'action must be overwrite or cancel'}), 400
         
         item = conversion_queue.get_item(item_id)
-        print(f"item found: {item}")
+        logger.debug("item found: %s", item)
         
         if not item:
             return jsonify({'error': 'item not found'}), 404
         
-        print(f"item status: {item.status}")
+        logger.debug("item status: %s", item.status)
         if item.status != QueueStatus.PENDING_DUPLICATE:
             return jsonify({'error': 'item is not pending duplicate resolution'}), 400
         
-        print(f"pending transcription: {item.pending_transcription}")
+        logger.debug("pending transcription: %s", item.pending_transcription)
         if not item.pending_transcription:
             return jsonify({'error': 'no pending transcription data found'}), 400
         
@@ -431,25 +458,25 @@ def resolve_duplicate(item_id):
                 url = item.pending_transcription['url']
                 video_title = item.pending_transcription['video_title']
                 
-                existing_transcriptions = db.get_all_transcriptions()
-                for t in existing_transcriptions:
-                    if t.get('youtube_url') == url:
-                        db.delete_transcription(t['id'])
-                        break
+                existing_id = db.get_transcription_id_by_url(url)
+                if existing_id:
+                    db.delete_transcription(existing_id)
                 
                 item.pending_transcription = None
-                item.update_status(QueueStatus.DOWNLOADING)
+                # download_audio moves it to downloading once a worker picks it up
+                item.update_status(QueueStatus.QUEUED)
                 
                 def download_task():
+                    if not get_queued_item(item.id):
+                        print(f"item {item.id} was cancelled or removed before download")
+                        return
                     try:
                         download_audio(url, existing_item=item)
                     except Exception as e:
                         print(f"download error for {url}: {e}")
                         item.mark_failed(str(e))
                 
-                import threading
-                thread = threading.Thread(target=download_task, daemon=True)
-                thread.start()
+                download_executor.submit(download_task)
                 
                 return jsonify({
                     'success': True,
@@ -459,13 +486,7 @@ def resolve_duplicate(item_id):
             else:
                 filename = item.pending_transcription['filename']
                 
-                existing_transcriptions = db.get_all_transcriptions()
-                existing_id = None
-                for t in existing_transcriptions:
-                    if t['filename'] == filename:
-                        existing_id = t['id']
-                        break
-                
+                existing_id = db.get_transcription_id_by_filename(filename)
                 if existing_id:
                     db.delete_transcription(existing_id)
             
@@ -485,8 +506,7 @@ def resolve_duplicate(item_id):
                     temp_dir = config.TEMP_DIR
                     output_path = temp_dir / filename
                     with open(output_path, "w", encoding="utf-8") as f:
-                        f.write(header)
-                    f.write(content)
+                        f.write(header + content)
                 
                 db.add_transcription(filename, content, item.id)
                 item.update_status(QueueStatus.COMPLETED)
@@ -544,12 +564,17 @@ def force_gpu_cleanup():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def stop_downloads():
+    """drop downloads still waiting for a worker; running yt-dlp processes finish before exit"""
+    download_executor.shutdown(wait=False, cancel_futures=True)
+
 def run_server(host=None, port=None, debug=None):
     """start the flask server"""
     host = host or config.HOST
     port = port or config.PORT
     debug = debug if debug is not None else config.DEBUG
     
+    logging.basicConfig(level=config.LOG_LEVEL)
     print(f"starting transcription api server on http://{host}:{port}")
     app.run(host=host, port=port, debug=debug, threaded=True)
 
@@ -1,17 +1,19 @@
 import threading
 import time
+from concurrent.futures import wait
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core import TranscriptionOrchestrator, trigger_media_processing
-from server.api_server import run_server
+from server.api_server import run_server, stop_downloads
+from wrappers.media_manager import stop_conversions
 
 def run_orchestrator():
     print("starting transcription orchestrator...")
     
-    media_threads = trigger_media_processing()
+    media_futures = trigger_media_processing()
     
     orchestrator = TranscriptionOrchestrator()
     try:
@@ -20,10 +22,9 @@ def run_orchestrator():
         print("\nstopping orchestrator...")
         orchestrator.cleanup()
         
-        print("waiting for media processing threads to complete...")
-        for thread in media_threads:
-            if thread.is_alive():
-                thread.join(timeout=5)
+        print("waiting for media processing to complete...")
+        stop_conversions()
+        wait(media_futures, timeout=5)
 
 def main():
     print("starting transcription automation server...")
@@ -39,6 +40,8 @@ def main():
         
     except KeyboardInterrupt:
         print("\nshutting down server...")
+        stop_downloads()
+        stop_conversions()
     finally:
         pass
 
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 from wrappers.db.db_manager import TranscriptionDB
 
 def test_db_manager():
@@ -8,5 +9,34 @@ def test_db_manager():
     assert transcription is not None
     assert transcription == "test transcription"
 
+def test_exists_tracks_add_and_delete(tmp_path):
+    db = TranscriptionDB(tmp_path / "t.db")
+    other = TranscriptionDB(tmp_path / "t.db")
+    assert not other.transcription_exists("cached.ogg")
+    db.add_transcription("cached.ogg", "cached transcription", "cache queue item", "https://youtu.be/cached")
+    assert other.transcription_exists("cached.ogg")
+    assert other.youtube_url_exists("https://youtu.be/cached")
+    db.delete_transcription(db.get_transcription_id_by_filename("cached.ogg"))
+    assert not other.transcription_exists("cached.ogg")
+    assert not other.youtube_url_exists("https://youtu.be/cached")
+
+def test_exists_sees_other_connections(tmp_path):
+    db = TranscriptionDB(tmp_path / "t.db")
+    assert not db.transcription_exists("external.ogg")
+    # stands in for another process writing to the same file
+    with sqlite3.connect(tmp_path / "t.db") as conn:
+        conn.execute("""
+        INSERT INTO transcriptions (filename, transcribed_time, content)
+        VALUES ('external.ogg', '', 'external transcription')""")
+    assert db.transcription_exists("external.ogg")
+    with sqlite3.connect(tmp_path / "t.db") as conn:
+        conn.execute("DELETE FROM transcriptions WHERE filename = 'external.ogg'")
+    assert not db.transcription_exists("external.ogg")
+
 if __name__ == "__main__":
-    test_db_manager()
\ No newline at end of file
+    import tempfile
+    from pathlib import Path
+    test_db_manager()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_exists_tracks_add_and_delete(Path(tmp))
+        test_exists_sees_other_connections(Path(tmp))
\ No newline at end of file
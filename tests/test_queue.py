@@ -1,3 +1,6 @@
+import json
+from datetime import datetime
+from config import config
 from wrappers.queue_manager import QueueManager, QueueStatus
 
 def test_queue_manager():
@@ -15,5 +18,70 @@ def test_queue_manager():
     print("Next item:", queue_manager.get_next_item().url if queue_manager.get_next_item() else "None")
     print("Queue counts:", queue_manager.get_queue_counts())
 
+def _temp_queue_manager(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "queue.db"))
+    monkeypatch.setattr(config, "TEMP_DIR", tmp_path / "temp")
+    return QueueManager()
+
+def test_write_behind_flush(monkeypatch, tmp_path):
+    queue_manager = _temp_queue_manager(monkeypatch, tmp_path)
+    written = []
+    save_queue_items = queue_manager.db.save_queue_items
+    def record(items):
+        written.extend(item.id for item in items)
+        return save_queue_items(items)
+    monkeypatch.setattr(queue_manager.db, "save_queue_items", record)
+
+    # hold the write lock so the background flusher can't split the burst
+    with queue_manager._write_lock:
+        item_id = queue_manager.add_item("burst.mp4")
+        item = queue_manager.get_item(item_id)
+        item.update_status(QueueStatus.DOWNLOADING)
+        item.update_status(QueueStatus.CONVERTING)
+    queue_manager.flush()
+    assert written.count(item_id) == 1
+    assert QueueManager().get_item(item_id).status == QueueStatus.CONVERTING
+
+    # final states are written without waiting for a flush
+    item.update_status(QueueStatus.FAILED, "boom")
+    rows = {row['id']: row for row in queue_manager.db.load_queue_items()}
+    assert rows[item_id]['status'] == QueueStatus.FAILED.value
+
+    # a removed item must not be written back by a later flush, even while dirty
+    item.update_status(QueueStatus.CONVERTING)
+    assert queue_manager.remove_item(item_id)
+    queue_manager.flush()
+    assert item_id not in {row['id'] for row in queue_manager.db.load_queue_items()}
+
+def test_failed_flush_keeps_items_dirty(monkeypatch, tmp_path):
+    queue_manager = _temp_queue_manager(monkeypatch, tmp_path)
+    monkeypatch.setattr(queue_manager.db, "save_queue_items", lambda items: False)
+    item_id = queue_manager.add_item("retry.mp4")
+    queue_manager.flush()
+    assert item_id in queue_manager._dirty_ids
+
+    monkeypatch.undo()
+    queue_manager.flush()
+    assert not queue_manager._dirty_ids
+    assert item_id in {row['id'] for row in queue_manager.db.load_queue_items()}
+
+def test_legacy_pending_transcription_migrates_to_json(monkeypatch, tmp_path):
+    queue_manager = _temp_queue_manager(monkeypatch, tmp_path)
+    pending = {'filename': 'legacy.ogg', 'existing_transcription': {'id': 1}}
+    with queue_manager.db.get_connection() as conn:
+        conn.execute("""
+        INSERT INTO queue_items (id, file_path, url, video_title, status, created_at, updated_at,
+                                 error_message, pending_transcription)
+        VALUES ('legacy', 'legacy.ogg', NULL, NULL, ?, ?, ?, NULL, ?)""",
+            (QueueStatus.PENDING_DUPLICATE.value, datetime.now().isoformat(),
+             datetime.now().isoformat(), str(pending)))
+        conn.commit()
+
+    migrated = QueueManager()
+    assert migrated.get_item('legacy').pending_transcription == pending
+    migrated.flush()
+    row = next(row for row in migrated.db.load_queue_items() if row['id'] == 'legacy')
+    assert json.loads(row['pending_transcription']) == pending
+
 if __name__ == "__main__":
-    test_queue_manager()
\ No newline at end of file
+    test_queue_manager()
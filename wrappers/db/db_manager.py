@@ -1,11 +1,71 @@
 import sqlite3
 import threading
+import json
+import atexit
+import queue
 from pathlib import Path
 from datetime import datetime, timedelta
-import pytz
+from zoneinfo import ZoneInfo
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
 
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS transcriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    content TEXT NOT NULL,
+    transcribed_time TEXT NOT NULL,
+    queue_item_id TEXT,
+    youtube_url TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_transcriptions_filename ON transcriptions(filename);
+CREATE INDEX IF NOT EXISTS idx_transcriptions_youtube_url ON transcriptions(youtube_url);
+
+CREATE TABLE IF NOT EXISTS queue_items (
+    id TEXT PRIMARY KEY,
+    file_path TEXT,
+    url TEXT,
+    video_title TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    error_message TEXT,
+    pending_transcription TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_queue_items_status_updated ON queue_items(status, updated_at);
+"""
+
+# hot-path statements kept in one place for readability, sqlite3 caches prepared statements by sql text either way
+GET_TRANSCRIPTION_SQL = "SELECT content FROM transcriptions WHERE filename = ?"
+TRANSCRIPTION_EXISTS_SQL = "SELECT 1 FROM transcriptions WHERE filename = ?"
+YOUTUBE_URL_EXISTS_SQL = "SELECT 1 FROM transcriptions WHERE youtube_url = ?"
+# one bound json array instead of an IN list sized per call, no parameter limit
+DELETE_TRANSCRIPTIONS_SQL = "DELETE FROM transcriptions WHERE id IN (SELECT value FROM json_each(?))"
+DELETE_QUEUE_ITEMS_SQL = "DELETE FROM queue_items WHERE id IN (SELECT value FROM json_each(?))"
+LOAD_QUEUE_ITEMS_SQL = """
+SELECT id, file_path, url, video_title, status, created_at, updated_at, error_message, pending_transcription
+FROM queue_items ORDER BY created_at
+"""
+# (sort_by, sort_order) -> listing statement, so the sort column is never formatted into sql per call
+ALL_TRANSCRIPTIONS_SQL = {
+    (column, order): f"SELECT id, filename, transcribed_time, queue_item_id, youtube_url FROM transcriptions ORDER BY {column} {order.upper()}"
+    for column in ("id", "filename")
+    for order in ("asc", "desc")
+}
+SAVE_QUEUE_ITEM_SQL = """
+INSERT OR REPLACE INTO queue_items
+(id, file_path, url, video_title, status, created_at, updated_at, error_message, pending_transcription)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+PST = ZoneInfo("America/Los_Angeles")
+
+# db paths whose schema has already been applied in this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
 class TranscriptionDB:
     def __init__(self, db_path: str = None):
         if db_path is None:
@@ -13,38 +73,64 @@ class TranscriptionDB:
             db_path = config.get_db_path()
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self._key = str(self.db_path.resolve())
         self._lock = threading.Lock()
+        self._conn = self._connect()
+        # idle read-only connections, checked out per query so readers skip the writer lock
+        self._readers = queue.SimpleQueue()
         self._init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        """open the long-lived connection shared by every query on this instance"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-16000")  # 16mb page cache
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256mb
+        return conn
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        """open a read-only connection for the reader pool"""
+        # as_uri percent-encodes the path, so ? # % in it can't be read as uri syntax
+        conn = sqlite3.connect(self.db_path.resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False,
+                               timeout=10)
+        conn.execute("PRAGMA cache_size=-16000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def close(self):
+        """close the shared connection and any pooled readers"""
+        with self._lock:
+            self._conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
     def _init_database(self):
-        with self.get_connection() as conn:
-            conn.execute("""
-        CREATE TABLE IF NOT EXISTS transcriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT NOT NULL,
-            content TEXT NOT NULL,
-            transcribed_time TEXT NOT NULL,
-            queue_item_id TEXT,
-            youtube_url TEXT
-        );""")
-            
-            conn.execute("""
-        CREATE TABLE IF NOT EXISTS queue_items (
-            id TEXT PRIMARY KEY,
-            file_path TEXT,
-            url TEXT,
-            video_title TEXT,
-            status TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            error_message TEXT,
-            pending_transcription TEXT
-        );""")
-            conn.commit()
+        """apply the schema once per db path per process, later instances skip the ddl"""
+        with _init_lock:
+            if self._key in _initialized_paths:
+                return
+            with self.get_connection() as conn:
+                conn.executescript(SCHEMA_SQL)
+                conn.execute("PRAGMA optimize")
+            _initialized_paths.add(self._key)
+            atexit.register(self._optimize)
+
+    def _optimize(self):
+        """refresh planner statistics for tables whose shape changed this session"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("PRAGMA optimize")
+        except Exception as e:
+            print(f"error optimizing database: {e}")
 
     def format_pst_time(self, dt: datetime = None) -> str:
         if dt is None:
-            dt = datetime.now(pytz.timezone("America/Los_Angeles"))
+            dt = datetime.now(PST)
         return dt.strftime("%Y-%m-%d %H:%M:%S PST")
     
     def add_transcription(self, filename: str, content: str, queue_item_id: str, youtube_url: str = None):
@@ -63,9 +149,8 @@ class TranscriptionDB:
         
     def get_transcription(self, filename: str):
         try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("""
-                SELECT content FROM transcriptions WHERE filename = ?;""", (filename,))
+            with self.get_read_connection() as conn:
+                cursor = conn.execute(GET_TRANSCRIPTION_SQL, (filename,))
                 transcription = cursor.fetchone()
                 return transcription[0] if transcription else None
         except Exception as e:
@@ -74,19 +159,16 @@ class TranscriptionDB:
     
     def get_all_transcriptions(self, sort_by: str = "id", sort_order: str = "desc"):
         try:
-            valid_columns = ["id", "filename"]
-            valid_orders = ["asc", "desc"]
-            
-            if sort_by not in valid_columns:
-                sort_by = "id"
-            if sort_order not in valid_orders:
-                sort_order = "desc"
+            sql = ALL_TRANSCRIPTIONS_SQL.get((sort_by, sort_order))
+            if sql is None:
+                # invalid values fall back per field, as before
+                sql = ALL_TRANSCRIPTIONS_SQL[(
+                    sort_by if sort_by in ("id", "filename") else "id",
+                    sort_order if sort_order in ("asc", "desc") else "desc",
+                )]
                 
-            with self.get_connection() as conn:
-                cursor = conn.execute(f"""
-                SELECT id, filename, transcribed_time, queue_item_id, youtube_url FROM transcriptions 
-                ORDER BY {sort_by} {sort_order.upper()};""")
-                rows = cursor.fetchall()
+            with self.get_read_connection() as conn:
+                rows = conn.execute(sql).fetchall()
                 
                 return [{
                     'id': row[0],
@@ -99,13 +181,37 @@ class TranscriptionDB:
             print(f"error getting all transcriptions: {e}")
             return []
         
+    def get_transcription_id_by_filename(self, filename: str) -> Optional[int]:
+        """get the id of the newest transcription with the given filename"""
+        try:
+            with self.get_read_connection() as conn:
+                cursor = conn.execute("""
+                SELECT id FROM transcriptions WHERE filename = ? ORDER BY id DESC LIMIT 1""", (filename,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            print(f"error getting transcription id for {filename}: {e}")
+            return None
+
+    def get_transcription_id_by_url(self, url: str) -> Optional[int]:
+        """get the id of the newest transcription for a youtube url"""
+        try:
+            with self.get_read_connection() as conn:
+                cursor = conn.execute("""
+                SELECT id FROM transcriptions WHERE youtube_url = ? ORDER BY id DESC LIMIT 1""", (url,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            print(f"error getting transcription id for {url}: {e}")
+            return None
+
     def delete_transcription(self, transcription_id: int) -> bool:
         """delete a single transcription by id"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.execute("DELETE FROM transcriptions WHERE id = ?", (transcription_id,))
                 conn.commit()
-                return cursor.rowcount > 0
+            return cursor.rowcount > 0
         except Exception as e:
             print(f"error deleting transcription {transcription_id}: {e}")
             return False
@@ -116,11 +222,10 @@ class TranscriptionDB:
             if not transcription_ids:
                 return 0
                 
-            placeholders = ','.join('?' * len(transcription_ids))
             with self.get_connection() as conn:
-                cursor = conn.execute(f"DELETE FROM transcriptions WHERE id IN ({placeholders})", transcription_ids)
+                cursor = conn.execute(DELETE_TRANSCRIPTIONS_SQL, (json.dumps(transcription_ids),))
                 conn.commit()
-                return cursor.rowcount
+            return cursor.rowcount
         except Exception as e:
             print(f"error deleting transcriptions {transcription_ids}: {e}")
             return 0
@@ -128,8 +233,8 @@ class TranscriptionDB:
     def transcription_exists(self, filename: str) -> bool:
         """check if a transcription with the given filename already exists"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("SELECT 1 FROM transcriptions WHERE filename = ?", (filename,))
+            with self.get_read_connection() as conn:
+                cursor = conn.execute(TRANSCRIPTION_EXISTS_SQL, (filename,))
                 return cursor.fetchone() is not None
         except Exception as e:
             print(f"error checking transcription existence: {e}")
@@ -138,8 +243,8 @@ class TranscriptionDB:
     def youtube_url_exists(self, url: str) -> bool:
         """check if youtube url already has a transcription"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("SELECT 1 FROM transcriptions WHERE youtube_url = ?", (url,))
+            with self.get_read_connection() as conn:
+                cursor = conn.execute(YOUTUBE_URL_EXISTS_SQL, (url,))
                 return cursor.fetchone() is not None
         except Exception as e:
             print(f"error checking youtube url existence: {e}")
@@ -148,7 +253,7 @@ class TranscriptionDB:
     def get_youtube_url_info(self, url: str) -> Optional[Dict[str, Any]]:
         """get transcription info for a youtube url if it exists"""
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.execute("""
                 SELECT filename, transcribed_time FROM transcriptions WHERE youtube_url = ?""", (url,))
                 row = cursor.fetchone()
@@ -168,35 +273,32 @@ class TranscriptionDB:
         """save or update a queue item in the database"""
         try:
             with self.get_connection() as conn:
-                conn.execute("""
-                INSERT OR REPLACE INTO queue_items 
-                (id, file_path, url, video_title, status, created_at, updated_at, error_message, pending_transcription)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    queue_item.id,
-                    str(queue_item.file_path) if queue_item.file_path else None,
-                    getattr(queue_item, 'url', None),
-                    getattr(queue_item, 'video_title', None),
-                    queue_item.status.value,
-                    queue_item.created_at.isoformat(),
-                    queue_item.updated_at.isoformat(),
-                    queue_item.error_message,
-                    str(getattr(queue_item, 'pending_transcription', None)) if getattr(queue_item, 'pending_transcription', None) else None
-                ))
+                conn.execute(SAVE_QUEUE_ITEM_SQL, queue_item.to_row())
                 conn.commit()
                 return True
         except Exception as e:
             print(f"error saving queue item {queue_item.id}: {e}")
             return False
 
+    def save_queue_items(self, queue_items: list) -> bool:
+        """save or update several queue items in one transaction"""
+        if not queue_items:
+            return True
+        try:
+            rows = [item.to_row() for item in queue_items]
+            with self.get_connection() as conn:
+                conn.executemany(SAVE_QUEUE_ITEM_SQL, rows)
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"error saving {len(queue_items)} queue items: {e}")
+            return False
+
     def load_queue_items(self) -> List[Dict[str, Any]]:
         """load all queue items from database"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.execute("""
-                SELECT id, file_path, url, video_title, status, created_at, updated_at, error_message, pending_transcription
-                FROM queue_items ORDER BY created_at
-                """)
+            with self.get_read_connection() as conn:
+                cursor = conn.execute(LOAD_QUEUE_ITEMS_SQL)
                 items = []
                 for row in cursor.fetchall():
                     items.append({
@@ -226,6 +328,19 @@ class TranscriptionDB:
             print(f"error deleting queue item {item_id}: {e}")
             return False
 
+    def delete_queue_items(self, item_ids: List[str]) -> int:
+        """delete several queue items in one statement, returns number deleted"""
+        if not item_ids:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute(DELETE_QUEUE_ITEMS_SQL, (json.dumps(item_ids),))
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            print(f"error deleting queue items {item_ids}: {e}")
+            return 0
+
     def cleanup_completed_queue_items(self) -> int:
         """remove completed/failed queue items older than 24 hours, returns count removed"""
         try:
@@ -242,11 +357,26 @@ class TranscriptionDB:
             print(f"error cleaning up queue items: {e}")
             return 0
 
+    @contextmanager
+    def get_read_connection(self):
+        """borrow a pooled read-only connection, wal lets it read alongside the writer"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
     @contextmanager
     def get_connection(self):
         with self._lock:
-            conn = sqlite3.connect(self.db_path)
             try:
-                yield conn
+                yield self._conn
             finally:
-                conn.close()
\ No newline at end of file
+                # discard anything the caller did not commit, as closing used to
+                if self._conn.in_transaction:
+                    self._conn.rollback()
\ No newline at end of file
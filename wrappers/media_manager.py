@@ -1,14 +1,43 @@
 import subprocess
 import os
-import glob
 import re
-import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from wrappers.queue_manager import QueueManager, QueueStatus
 from wrappers.db.db_manager import TranscriptionDB
 
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
 conversion_queue = QueueManager()
 db = TranscriptionDB()
+logger = logging.getLogger(__name__)
+
+def _conversion_workers():
+    from config import config
+    return config.CONVERSION_WORKERS
+
+# conversions stay in-process because they update conversion_queue, ffmpeg does the cpu work
+conversion_executor = ThreadPoolExecutor(max_workers=_conversion_workers(), thread_name_prefix="convert")
+
+INVALID_FILENAME_CHARS = str.maketrans('', '', '<>:"/\\|?*')
+WHITESPACE_RUN = re.compile(r'\s+')
+
+def _log_queue_snapshot():
+    """dump the whole queue at debug level only, it is o(n) to format"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("QueueManager: %s", conversion_queue.get_all_items())
+
+def get_queued_item(item_id):
+    """return the queue item if it is still waiting for a worker, None once cancelled or removed"""
+    item = conversion_queue.get_item(item_id)
+    if item and item.status == QueueStatus.QUEUED:
+        return item
+    return None
 
 def cleanup_item_files(item):
     """remove downloaded files when queue item is deleted"""
@@ -16,9 +45,10 @@ def cleanup_item_files(item):
         return
     
     try:
-        if os.path.exists(item.file_path):
-            os.remove(item.file_path)
-            print(f"cleaned up file: {item.file_path}")
+        os.remove(item.file_path)
+        print(f"cleaned up file: {item.file_path}")
+    except FileNotFoundError:
+        pass
     except Exception as e:
         print(f"error cleaning up file {item.file_path}: {e}")
 
@@ -33,51 +63,67 @@ def check_duplicate_before_conversion(item_id):
         item.update_status(QueueStatus.PENDING_DUPLICATE, f"duplicate filename: {filename}")
         item.pending_transcription = {'filename': filename, 'content': None, 'header': None}
 
+class VideoTitleError(Exception):
+    pass
+
+@lru_cache(maxsize=1024)
+def _fetch_video_title(yt_link):
+    """run yt-dlp for the title, raising so failed lookups are not cached"""
+    if YoutubeDL is not None:
+        # in-process extractor avoids a yt-dlp interpreter start per probe
+        with YoutubeDL({"quiet": True, "no_warnings": True, "skip_download": True}) as ydl:
+            info = ydl.extract_info(yt_link, download=False)
+        return info.get("title")
+    
+    result = subprocess.run([
+        "yt-dlp",
+        "--get-title",
+        yt_link
+    ], capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise VideoTitleError(result.stderr)
+    return result.stdout.strip()
+
 def get_video_title(yt_link):
     """get video title from yt-dlp without downloading"""
     try:
-        result = subprocess.run([
-            "yt-dlp",
-            "--get-title",
-            yt_link
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return result.stdout.strip()
-        else:
-            print(f"error getting video title: {result.stderr}")
-            return None
+        return _fetch_video_title(yt_link)
+    except VideoTitleError as e:
+        print(f"error getting video title: {e}")
+        return None
     except Exception as e:
         print(f"exception getting video title: {e}")
         return None
 
 def sanitize_filename(title):
     """sanitize video title for use as filename"""
-    sanitized = re.sub(r'[<>:"/\\|?*]', '', title)
-    sanitized = re.sub(r'\s+', ' ', sanitized)
+    sanitized = title.translate(INVALID_FILENAME_CHARS)
+    sanitized = WHITESPACE_RUN.sub(' ', sanitized)
     sanitized = sanitized.strip()
     return sanitized
 
-def check_file_exists(yt_link, temp_dir=None):
+def check_file_exists(yt_link, temp_dir=None, title=None):
     """check if .ogg file already exists for this youtube video"""
     if temp_dir is None:
         from config import config
         temp_dir = str(config.TEMP_DIR)
     
-    title = get_video_title(yt_link)
+    # callers that already know the title skip the yt-dlp probe
+    if title is None:
+        title = get_video_title(yt_link)
     if not title:
         return False, None
     
-    temp_path = Path(temp_dir)
-    if not temp_path.exists():
+    if not os.path.isdir(temp_dir):
         return False, None
     
-    ogg_files = list(temp_path.glob("*.ogg"))
-    
-    sanitized_title = sanitize_filename(title)
-    for ogg_file in ogg_files:
-        if sanitized_title.lower() in ogg_file.stem.lower():
-            return True, str(ogg_file)
+    # substring match, yt-dlp names files "<title> [<id>]" so the stem is not the bare title
+    sanitized_title = sanitize_filename(title).lower()
+    with os.scandir(temp_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".ogg") and sanitized_title in entry.name[:-4].lower():
+                return True, entry.path
     
     return False, None
 
@@ -93,7 +139,7 @@ def check_local_file_exists(mp4_path, temp_dir=None):
     base_name = os.path.splitext(os.path.basename(mp4_path))[0]
     expected_ogg_path = os.path.join(temp_dir, f"{base_name}.ogg")
     
-    if os.path.exists(expected_ogg_path):
+    if os.path.isfile(expected_ogg_path):
         return True, expected_ogg_path
     
     return False, None
@@ -104,12 +150,15 @@ def download_audio(yt_link, on_complete=None, existing_item=None):
     temp_dir = str(config.TEMP_DIR)
     
     if existing_item:
+        if not get_queued_item(existing_item.id):
+            print(f"item {existing_item.id} was cancelled or removed before download, skipping")
+            return "item cancelled before download"
         item_id = existing_item.id
         video_title = existing_item.video_title
     else:
         video_title = get_video_title(yt_link)
 
-    file_exists, existing_file_path = check_file_exists(yt_link, temp_dir)
+    file_exists, existing_file_path = check_file_exists(yt_link, temp_dir, video_title)
     if file_exists:
         print(f"file already exists: {existing_file_path}, skipping download...")
         if not existing_item:
@@ -127,7 +176,8 @@ def download_audio(yt_link, on_complete=None, existing_item=None):
     if not existing_item:
         item_id = conversion_queue.add_item(yt_link, yt_link, video_title)
     conversion_queue.get_item(item_id).update_status(QueueStatus.DOWNLOADING)
-    print(f"Downloading {yt_link}. \n\nQueueManager: {conversion_queue.get_all_items()}")
+    print(f"Downloading {yt_link}.")
+    _log_queue_snapshot()
     
     download_output = subprocess.run([
         "yt-dlp",
@@ -139,6 +189,9 @@ def download_audio(yt_link, on_complete=None, existing_item=None):
         "--no-check-certificate",
         "--extractor-args", "youtube:player_client=android",
         "--verbose",
+        # report the final post-processed path instead of scanning temp_dir for it
+        "--print", "after_move:filepath",
+        "--no-simulate",
         yt_link
     ], capture_output=True, text=True)
     
@@ -150,8 +203,8 @@ def download_audio(yt_link, on_complete=None, existing_item=None):
             on_complete(False, download_output.stdout + download_output.stderr, None)
         return download_output.stdout + download_output.stderr
     
-    opus_files = glob.glob(f"{temp_dir}/*.opus")
-    if not opus_files:
+    printed_paths = [line.strip() for line in download_output.stdout.splitlines() if line.strip()]
+    if not printed_paths or not os.path.isfile(printed_paths[-1]):
         error_msg = "no opus file found after download"
         item = conversion_queue.get_item(item_id)
         if item:
@@ -160,61 +213,64 @@ def download_audio(yt_link, on_complete=None, existing_item=None):
             on_complete(False, error_msg, None)
         return error_msg
     
-    opus_file = opus_files[0]
+    opus_file = printed_paths[-1]
     base_name = os.path.splitext(os.path.basename(opus_file))[0]
     ogg_file = f"{temp_dir}/{base_name}.ogg"
 
     conversion_queue.update_item_path(item_id, opus_file)
     conversion_queue.get_item(item_id).update_status(QueueStatus.CONVERTING)
 
-    convert_output = subprocess.run([
-        "ffmpeg",
-        "-nostdin",
-        "-hide_banner",
-        "-loglevel", "error",
-        "-i", opus_file,
-        "-map", "0:a:0",
-        "-vn",
-        "-c:a", "copy",
-        "-y",
-        ogg_file
-    ], capture_output=True, text=True)
+    # .opus from yt-dlp is already an ogg container, so a rename replaces the ffmpeg copy remux
+    try:
+        os.replace(opus_file, ogg_file)
+        converted = True
+        convert_message = ""
+    except OSError as e:
+        converted = False
+        convert_message = f"error renaming {opus_file} to {ogg_file}: {e}"
 
-    if convert_output.returncode == 0:
+    if converted:
         conversion_queue.update_item_path(item_id, ogg_file)
         conversion_queue.get_item(item_id).update_status(QueueStatus.CONVERTED)
-        print(f"Converted {opus_file} to {ogg_file}. \n\nQueueManager: {conversion_queue.get_all_items()}")
+        print(f"Converted {opus_file} to {ogg_file}.")
+        _log_queue_snapshot()
         
         check_duplicate_before_conversion(item_id)
     else:
-        conversion_queue.get_item(item_id).mark_failed(convert_output.stdout + convert_output.stderr)
-
-    if os.path.exists(opus_file):
-        os.remove(opus_file)
+        conversion_queue.get_item(item_id).mark_failed(convert_message)
+        try:
+            os.remove(opus_file)
+        except FileNotFoundError:
+            pass
     
-    combined_output = download_output.stdout + download_output.stderr + convert_output.stdout + convert_output.stderr
+    combined_output = download_output.stdout + download_output.stderr + convert_message
     
     if on_complete:
-        on_complete(convert_output.returncode == 0, combined_output, ogg_file)
+        on_complete(converted, combined_output, ogg_file)
     
     return combined_output
 
-def convert_to_audio(file_path, file_name=None, on_complete=None):
+def convert_to_audio(file_path, file_name=None, on_complete=None, existing_item=None):
 
     if file_name is None:
         base = os.path.basename(file_path)
         file_name = os.path.splitext(base)[0]
 
+    if existing_item and not get_queued_item(existing_item.id):
+        print(f"item {existing_item.id} was cancelled or removed before conversion, skipping")
+        return "item cancelled before conversion"
+
     from config import config
     output_path = config.TEMP_DIR / f"{file_name}.ogg"
 
     file_exists, existing_file_path = check_local_file_exists(file_path)
     if file_exists:
         print(f"file already exists: {existing_file_path}, skipping conversion...")
-        item_id = conversion_queue.add_item(file_path)
+        item_id = existing_item.id if existing_item else conversion_queue.add_item(file_path)
         conversion_queue.update_item_path(item_id, existing_file_path)
         conversion_queue.get_item(item_id).update_status(QueueStatus.SKIPPED)
-        print(f"Skipped conversion of {file_path} - file already exists. \n\nQueueManager: {conversion_queue.get_all_items()}")
+        print(f"Skipped conversion of {file_path} - file already exists.")
+        _log_queue_snapshot()
         
         check_duplicate_before_conversion(item_id)
         
@@ -222,9 +278,10 @@ def convert_to_audio(file_path, file_name=None, on_complete=None):
             on_complete(True, "file already exists, skipped conversion", existing_file_path)
         return "file already exists, skipped conversion"
 
-    item_id = conversion_queue.add_item(file_path)
+    item_id = existing_item.id if existing_item else conversion_queue.add_item(file_path)
     conversion_queue.get_item(item_id).update_status(QueueStatus.CONVERTING)
-    print(f"Converting {file_path} to {output_path}. \n\nQueueManager: {conversion_queue.get_all_items()}")
+    print(f"Converting {file_path} to {output_path}.")
+    _log_queue_snapshot()
 
     output = subprocess.run([
         "ffmpeg",
@@ -246,7 +303,8 @@ def convert_to_audio(file_path, file_name=None, on_complete=None):
         item = conversion_queue.get_item(item_id)
         if item:
             item.update_status(QueueStatus.CONVERTED)
-            print(f"Converted {file_path} to {output_path}. \n\nQueueManager: {conversion_queue.get_all_items()}")
+            print(f"Converted {file_path} to {output_path}.")
+            _log_queue_snapshot()
             check_duplicate_before_conversion(item_id)
         else:
             print(f"Item {item_id} was removed from queue during conversion")
@@ -268,15 +326,12 @@ def TEST_get_all_media_files(temp_dir=None):
     if temp_dir is None:
         from config import config
         temp_dir = str(config.TEMP_DIR)
-    temp_path = Path(temp_dir)
-    if not temp_path.exists():
+    if not os.path.isdir(temp_dir):
         return []
     
-    mp4_files = list(temp_path.glob("*.mp4"))
-    ogg_files = list(temp_path.glob("*.ogg"))
-    
-    all_files = mp4_files + ogg_files
-    return [str(f) for f in all_files]
+    # one directory pass instead of a glob per extension
+    with os.scandir(temp_dir) as it:
+        return [entry.path for entry in it if entry.name.endswith((".mp4", ".ogg"))]
 
 def TEST_async_convert_all_media():
     """async wrapper to convert all media files found in .temp directory"""
@@ -286,18 +341,28 @@ def TEST_async_convert_all_media():
         print("no media files found in .temp directory")
         return []
     
-    threads = []
+    futures = []
     for file_path in media_files:
         if file_path.endswith('.mp4'):
-            def convert_task(fp=file_path):
-                convert_to_audio(fp, on_complete=lambda success, output, file_path: 
-                                print(f"test convert complete: {success} - {file_path}"))
+            # queue the item now so it is visible while waiting for a worker
+            item_id = conversion_queue.add_item(file_path)
             
-            thread = threading.Thread(target=convert_task, daemon=True)
-            thread.start()
-            threads.append(thread)
-            print(f"started conversion for: {file_path}")
+            def convert_task(fp=file_path, item_id=item_id):
+                item = get_queued_item(item_id)
+                if not item:
+                    print(f"item {item_id} was cancelled or removed before conversion")
+                    return
+                convert_to_audio(fp, existing_item=item,
+                                 on_complete=lambda success, output, file_path: 
+                                 print(f"test convert complete: {success} - {file_path}"))
+            
+            futures.append(conversion_executor.submit(convert_task))
+            print(f"queued conversion for: {file_path}")
         else:
             print(f"skipping already converted file: {file_path}")
     
-    return threads
\ No newline at end of file
+    return futures
+
+def stop_conversions():
+    """drop conversions still waiting for a worker; running ffmpeg encodes finish before exit"""
+    conversion_executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -1,7 +1,17 @@
+from collections import deque
 from enum import Enum
 from datetime import datetime
 from typing import Optional
+import os
+import ast
+import json
 import uuid
+import time
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 class QueueStatus(Enum):
     QUEUED = "queued"
@@ -15,7 +25,14 @@ class QueueStatus(Enum):
     CANCELLED = "cancelled"
     PENDING_DUPLICATE = "pending_duplicate"
 
+# direct value -> member map, skips the Enum call protocol when reloading rows
+_STATUS_BY_VALUE = QueueStatus._value2member_map_
+
 class QueueItem:
+    # no per-instance __dict__, the queue can hold every item loaded from the db
+    __slots__ = ("id", "url", "file_path", "video_title", "status", "created_at",
+                 "updated_at", "error_message", "pending_transcription", "_manager")
+
     id: str
     file_path: str
     status: QueueStatus
@@ -29,38 +46,69 @@ class QueueItem:
         self.file_path = file_path
         self.video_title = video_title
         self.status = QueueStatus.QUEUED
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
         self.error_message = None
         self.pending_transcription = None
+        # owning QueueManager, set when the item is queued and cleared when removed
+        self._manager = None
 
     def update_status(self, new_status: QueueStatus, error_message: Optional[str] = None):
-        self.status = new_status
+        manager = self._manager
+        if manager is not None:
+            manager._set_status(self, new_status)
+        else:
+            self.status = new_status
         self.error_message = error_message
         self.updated_at = datetime.now()
-        print(f"Updated status for item {self.id} to {new_status}")
+        logger.debug("Updated status for item %s to %s", self.id, new_status)
         
-        try:
-            from wrappers.media_manager import conversion_queue
-            if hasattr(conversion_queue, '_save_to_db'):
-                conversion_queue._save_to_db(self)
-        except:
-            pass  
+        # persist through the owning manager, detached items have nothing to save to
+        if manager is not None:
+            manager._save_to_db(self)
 
     def mark_failed(self, error: str):
         self.update_status(QueueStatus.FAILED, error)
         print(f"Marked item {self.id} as failed: {error}")
     
+    def to_row(self) -> tuple:
+        """column values for the queue_items upsert, in SAVE_QUEUE_ITEM_SQL order"""
+        return (
+            self.id,
+            str(self.file_path) if self.file_path else None,
+            self.url,
+            self.video_title,
+            self.status.value,
+            self.created_at.isoformat(),
+            self.updated_at.isoformat(),
+            self.error_message,
+            json.dumps(self.pending_transcription) if self.pending_transcription else None
+        )
+    
     def __repr__(self):
         return f"QueueItem(id='{self.id}', file_path='{self.file_path}', status={self.status})"
 
 class QueueManager:
     def __init__(self):
         self.queue = {}
-        self.processing_order = []
+        self.processing_order = deque()
+        # ids still in processing_order, and removed ones get_next_item should skip
+        self._ordered_ids = set()
+        self._tombstones = set()
+        # status -> ids in that status, dicts used as ordered sets so buckets stay fifo;
+        # kept in step with every transition so lookups and counts never scan the queue
+        self._by_status = {status: {} for status in QueueStatus}
+        self._status_lock = threading.Lock()
         self.db = None
+        # write-behind persistence: mutations mark ids dirty, the flusher writes them in bursts
+        self._dirty_ids = set()
+        self._dirty_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_interval = 0.25
         self._init_db()
         self._load_from_db()
+        if self.db:
+            threading.Thread(target=self._flusher, daemon=True).start()
+            atexit.register(self.flush)
     
     def _init_db(self):
         """initialize database connection"""
@@ -82,22 +130,29 @@ class QueueManager:
                 item.file_path = item_data['file_path']
                 item.url = item_data['url']
                 item.video_title = item_data['video_title']
-                item.status = QueueStatus(item_data['status'])
+                item.status = _STATUS_BY_VALUE[item_data['status']]
                 item.created_at = datetime.fromisoformat(item_data['created_at'])
                 item.updated_at = datetime.fromisoformat(item_data['updated_at'])
                 item.error_message = item_data['error_message']
                 
-                if item_data['pending_transcription'] and item_data['pending_transcription'] != 'None':
+                if item_data['pending_transcription'] not in (None, '', 'None'):
                     try:
-                        import ast
-                        item.pending_transcription = ast.literal_eval(item_data['pending_transcription'])
-                    except:
-                        item.pending_transcription = None
+                        item.pending_transcription = json.loads(item_data['pending_transcription'])
+                    except ValueError:
+                        # rows saved before the json column hold a python repr, rewrite them on the next flush
+                        try:
+                            item.pending_transcription = ast.literal_eval(item_data['pending_transcription'])
+                            self._dirty_ids.add(item.id)
+                        except (ValueError, SyntaxError):
+                            item.pending_transcription = None
                 
+                item._manager = self
                 self.queue[item.id] = item
+                self._by_status[item.status][item.id] = None
                 final_states = {QueueStatus.COMPLETED, QueueStatus.FAILED, QueueStatus.CANCELLED}
                 if item.status not in final_states:
                     self.processing_order.append(item.id)
+                    self._ordered_ids.add(item.id)
             
             print(f"loaded {len(db_items)} queue items from database")
             
@@ -115,30 +170,34 @@ class QueueManager:
         """cleanup all files in .temp directory"""
         try:
             from config import config
-            from pathlib import Path
-            import os
             
-            temp_dir = Path(config.TEMP_DIR)
-            if not temp_dir.exists():
+            temp_dir = config.TEMP_DIR
+            if not os.path.isdir(temp_dir):
                 return
             
-            # get all files in temp directory
-            temp_files = [f for f in temp_dir.iterdir() if f.is_file()]
+            # scandir entries carry their file type, so no extra stat per file
+            with os.scandir(temp_dir) as it:
+                temp_files = [entry for entry in it if entry.is_file()]
             
             if not temp_files:
                 return
             
+            # totals only, a print per file is a stdout write per file
             cleaned_count = 0
+            failed_count = 0
+            last_error = None
             for temp_file in temp_files:
                 try:
-                    os.remove(temp_file)
-                    print(f"cleaned up temp file: {temp_file.name}")
+                    os.unlink(temp_file.path)
                     cleaned_count += 1
-                except Exception as e:
-                    print(f"error cleaning up {temp_file}: {e}")
+                except OSError as e:
+                    failed_count += 1
+                    last_error = e
             
             if cleaned_count > 0:
                 print(f"cleaned up {cleaned_count} temp files")
+            if failed_count > 0:
+                print(f"error cleaning up {failed_count} temp files, last error: {last_error}")
                 
         except Exception as e:
             print(f"error during temp file cleanup: {e}")
@@ -149,20 +208,46 @@ class QueueManager:
         self._cleanup_orphaned_temp_files()
     
     def _save_to_db(self, item):
-        """save queue item to database"""
-        if self.db:
-            try:
-                self.db.save_queue_item(item)
-            except Exception as e:
-                print(f"error saving queue item to database: {e}")
+        """mark queue item for the next flush, final states are written straight away"""
+        if not self.db:
+            return
+        with self._dirty_lock:
+            self._dirty_ids.add(item.id)
+        if item.status in {QueueStatus.COMPLETED, QueueStatus.FAILED, QueueStatus.CANCELLED}:
+            self.flush()
+    
+    def flush(self):
+        """write every dirty queue item to the database"""
+        if not self.db:
+            return
+        # swap the dirty set under the short lock so mutators never wait on the db write
+        with self._write_lock:
+            with self._dirty_lock:
+                dirty_ids, self._dirty_ids = self._dirty_ids, set()
+            items = [self.queue[item_id] for item_id in dirty_ids if item_id in self.queue]
+            if not self.db.save_queue_items(items):
+                # keep them dirty so the next flush retries the write
+                with self._dirty_lock:
+                    self._dirty_ids.update(item.id for item in items)
+    
+    def _flusher(self):
+        """background loop that collapses bursts of status updates into one write each"""
+        while True:
+            time.sleep(self._flush_interval)
+            if self._dirty_ids:
+                self.flush()
     
     def add_item(self, file_path: str, url: Optional[str] = None, video_title: Optional[str] = None) -> str:
-        item_id = str(uuid.uuid4())
+        item_id = uuid.uuid4().hex
         item = QueueItem(item_id, file_path, url, video_title)
-        self.queue[item_id] = item
+        item._manager = self
+        with self._status_lock:
+            self.queue[item_id] = item
+            self._by_status[item.status][item_id] = None
         self.processing_order.append(item_id)
+        self._ordered_ids.add(item_id)
         self._save_to_db(item)
-        print(f"Added item {item_id} for {file_path}")
+        logger.debug("Added item %s for %s", item_id, file_path)
         return item_id
     
     def update_item_path(self, item_id: str, new_file_path: str):
@@ -170,56 +255,92 @@ class QueueManager:
             self.queue[item_id].file_path = new_file_path
             self.queue[item_id].updated_at = datetime.now()
             self._save_to_db(self.queue[item_id])
-            print(f"Updated file path for item {item_id} to {new_file_path}")
+            logger.debug("Updated file path for item %s to %s", item_id, new_file_path)
         else:
             print(f"Item {item_id} not found in queue")
     
     def get_next_item(self) -> Optional[QueueItem]:
-        if not self.processing_order:
-            return None
-        item_id = self.processing_order.pop(0)
-        print(f"Getting next item {item_id}")
-        return self.queue[item_id]
+        while self.processing_order:
+            item_id = self.processing_order.popleft()
+            if item_id in self._tombstones:
+                self._tombstones.discard(item_id)
+                continue
+            self._ordered_ids.discard(item_id)
+            logger.debug("Getting next item %s", item_id)
+            return self.queue[item_id]
+        return None
+    
+    def _set_status(self, item: QueueItem, new_status: QueueStatus):
+        """move an item between status buckets, called by QueueItem.update_status"""
+        with self._status_lock:
+            if item._manager is self:
+                self._by_status[item.status].pop(item.id, None)
+                self._by_status[new_status][item.id] = None
+            item.status = new_status
+    
+    def count(self, status: QueueStatus) -> int:
+        return len(self._by_status[status])
     
     def get_queue_counts(self) -> dict:
-        return {status.value: sum(1 for item in self.queue.values() if item.status == status) for status in QueueStatus}
+        with self._status_lock:
+            return {status.value: len(self._by_status[status]) for status in QueueStatus}
     
     def get_item(self, item_id: str) -> Optional[QueueItem]:
         return self.queue.get(item_id)
     
     def get_all_items(self) -> list[QueueItem]:
+        # list() copies in one step, so callers never iterate the live dict while
+        # download threads are adding items to it
         return list(self.queue.values())
     
     def get_all_items_by_status(self, status: QueueStatus) -> list[QueueItem]:
-        return [item for item in self.queue.values() if item.status == status]
+        with self._status_lock:
+            return [self.queue[item_id] for item_id in self._by_status[status]]
     
     def get_ready_items_for_transcription(self) -> list[QueueItem]:
         """get items ready for transcription, excluding pending duplicates"""
-        ready_statuses = {QueueStatus.CONVERTED, QueueStatus.SKIPPED}
-        return [item for item in self.queue.values() if item.status in ready_statuses]
+        with self._status_lock:
+            return [self.queue[item_id]
+                    for status in (QueueStatus.CONVERTED, QueueStatus.SKIPPED)
+                    for item_id in self._by_status[status]]
     
     def get_pending_duplicates(self) -> list[QueueItem]:
         """get all items pending duplicate resolution"""
-        return [item for item in self.queue.values() if item.status == QueueStatus.PENDING_DUPLICATE]
+        return self.get_all_items_by_status(QueueStatus.PENDING_DUPLICATE)
     
     def remove_item(self, item_id: str) -> bool:
         if item_id in self.queue:
-            item = self.queue[item_id]
-            try:
-                from wrappers.media_manager import cleanup_item_files
+            self._remove_items([item_id])
+            return True
+        return False
+    
+    def _remove_items(self, item_ids: list[str]):
+        """drop items from memory and the database, deleting all their rows in one statement"""
+        items = [self.queue[item_id] for item_id in item_ids]
+        try:
+            from wrappers.media_manager import cleanup_item_files
+            for item in items:
                 cleanup_item_files(item)
-            except ImportError:
-                pass
-            
+        except ImportError:
+            pass
+        
+        # hold the write lock so a concurrent flush can't write the rows back
+        with self._write_lock:
+            with self._dirty_lock:
+                self._dirty_ids.difference_update(item_ids)
             if self.db:
-                self.db.delete_queue_item(item_id)
-            
-            del self.queue[item_id]
-            if item_id in self.processing_order:
-                self.processing_order.remove(item_id)
+                self.db.delete_queue_items(item_ids)
+            with self._status_lock:
+                for item in items:
+                    del self.queue[item.id]
+                    self._by_status[item.status].pop(item.id, None)
+                    item._manager = None
+        for item_id in item_ids:
+            # lazy delete, get_next_item drops the id when it reaches the front
+            if item_id in self._ordered_ids:
+                self._ordered_ids.discard(item_id)
+                self._tombstones.add(item_id)
             print(f"removed item {item_id} from queue")
-            return True
-        return False
     
     def can_cancel_item(self, item_id: str) -> bool:
         """check if item can be cancelled (is in active processing states)"""
@@ -246,9 +367,12 @@ class QueueManager:
             'cannot_remove': 0
         }
         
+        removable = []
+        removable_ids = set()
         for item_id in item_ids:
             item = self.get_item(item_id)
-            if not item:
+            # a repeated id was already removed by the time the old per-item loop reached it
+            if not item or item_id in removable_ids:
                 result['not_found'] += 1
                 continue
             
@@ -256,9 +380,12 @@ class QueueManager:
                 item.update_status(QueueStatus.CANCELLED, "cancelled by user")
                 result['cancelled'] += 1
             elif self.can_remove_item(item_id):
-                self.remove_item(item_id)
+                removable.append(item_id)
+                removable_ids.add(item_id)
                 result['removed'] += 1
             else:
                 result['cannot_remove'] += 1
         
+        if removable:
+            self._remove_items(removable)
         return result
\ No newline at end of file
@@ -3,17 +3,27 @@
 transcription statistics collector - monitors gpu usage, memory, and timing
 """
 
+import os
 import time
 import threading
 import csv
 import psutil
 import subprocess
+from array import array
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
 
 class TranscriptionStatistics:
+    # summary csv paths known to already start with a header in this process
+    _summary_headers_written = set()
+
     def __init__(self, session_name: str):
         self.session_name = session_name
         self.stats_dir = Path("/home/jack/llm/transcription/.stats")
@@ -23,11 +33,16 @@ class TranscriptionStatistics:
         self.end_time: Optional[float] = None
         self.monitoring = False
         self.monitor_thread: Optional[threading.Thread] = None
+        # set by stop_monitoring to wake the sampler out of its wait immediately
+        self._stop_event = threading.Event()
         
-        # collected stats
-        self.gpu_usage_samples = []
-        self.memory_samples = []
-        self.sample_timestamps = []
+        # collected stats, unboxed doubles so long sessions stay at 8 bytes per sample
+        self.gpu_usage_samples = array('d')
+        self.memory_samples = array('d')
+        self.sample_timestamps = array('d')
+        
+        # in-process nvml handle, None falls back to spawning nvidia-smi per sample
+        self._gpu_handle = None
         
     def start_monitoring(self):
         """start collecting gpu and memory stats"""
@@ -36,6 +51,14 @@ class TranscriptionStatistics:
             
         self.start_time = time.time()
         self.monitoring = True
+        self._stop_event.clear()
+        if pynvml is not None:
+            try:
+                pynvml.nvmlInit()
+                self._gpu_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            except Exception as e:
+                print(f"nvml unavailable, using nvidia-smi: {e}")
+                self._gpu_handle = None
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         print(f"transcription statistics monitoring started for session: {self.session_name}")
@@ -47,19 +70,27 @@ class TranscriptionStatistics:
             
         self.end_time = time.time()
         self.monitoring = False
+        self._stop_event.set()
         
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=2)
+        
+        if self._gpu_handle is not None:
+            self._gpu_handle = None
+            try:
+                pynvml.nvmlShutdown()
+            except Exception:
+                pass
             
         self._save_to_csv()
         print(f"transcription statistics saved for session: {self.session_name}")
         
     def _monitor_loop(self):
         """continuous monitoring loop collecting stats every 0.5 seconds"""
-        while self.monitoring:
+        while not self._stop_event.is_set():
             timestamp = time.time()
             
-            # gpu usage via nvidia-smi
+            # gpu usage via nvml, or nvidia-smi when nvml is unavailable
             gpu_usage = self._get_gpu_usage()
             
             # memory usage via psutil
@@ -70,10 +101,16 @@ class TranscriptionStatistics:
             self.gpu_usage_samples.append(gpu_usage)
             self.memory_samples.append(memory_used_gb)
             
-            time.sleep(0.5)
+            self._stop_event.wait(0.5)
             
     def _get_gpu_usage(self) -> float:
-        """get gpu utilization percentage via nvidia-smi"""
+        """get gpu utilization percentage via nvml, or nvidia-smi when nvml is missing"""
+        if self._gpu_handle is not None:
+            try:
+                return float(pynvml.nvmlDeviceGetUtilizationRates(self._gpu_handle).gpu)
+            except Exception:
+                return 0.0
+        
         try:
             result = subprocess.run([
                 "nvidia-smi", 
@@ -101,18 +138,21 @@ class TranscriptionStatistics:
         
         # summary csv file
         summary_file = self.stats_dir / "transcription_summary.csv"
-        file_exists = summary_file.exists()
         
-        with open(summary_file, "a", newline="") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow([
-                    "session_name", "start_time", "total_duration_sec", 
-                    "avg_gpu_usage_pct", "max_gpu_usage_pct", 
-                    "avg_memory_gb", "max_memory_gb", "sample_count"
-                ])
+        # o_append makes each flushed row land at the end even with several writers
+        fd = os.open(summary_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "a", newline="") as f:
+            rows = []
+            if summary_file not in self._summary_headers_written:
+                if os.fstat(fd).st_size == 0:
+                    rows.append([
+                        "session_name", "start_time", "total_duration_sec", 
+                        "avg_gpu_usage_pct", "max_gpu_usage_pct", 
+                        "avg_memory_gb", "max_memory_gb", "sample_count"
+                    ])
+                self._summary_headers_written.add(summary_file)
             
-            writer.writerow([
+            rows.append([
                 self.session_name,
                 datetime.fromtimestamp(self.start_time).isoformat(),
                 f"{total_duration:.2f}",
@@ -122,18 +162,18 @@ class TranscriptionStatistics:
                 f"{max_memory_gb:.2f}",
                 len(self.sample_timestamps)
             ])
+            csv.writer(f).writerows(rows)
             
         # detailed csv file with all samples
         detail_file = self.stats_dir / f"transcription_details_{self.session_name}_{int(self.start_time)}.csv"
         with open(detail_file, "w", newline="") as f:
             writer = csv.writer(f)
             writer.writerow(["timestamp", "elapsed_sec", "gpu_usage_pct", "memory_gb"])
-            
-            for i, ts in enumerate(self.sample_timestamps):
-                elapsed = ts - self.start_time
-                gpu_usage = self.gpu_usage_samples[i] if i < len(self.gpu_usage_samples) else 0
-                memory_gb = self.memory_samples[i] if i < len(self.memory_samples) else 0
-                writer.writerow([ts, f"{elapsed:.1f}", f"{gpu_usage:.1f}", f"{memory_gb:.2f}"])
+            # zip stops at the shortest buffer, dropping a sample the monitor was mid-way through
+            writer.writerows(
+                (ts, f"{ts - self.start_time:.1f}", f"{gpu_usage:.1f}", f"{memory_gb:.2f}")
+                for ts, gpu_usage, memory_gb in zip(self.sample_timestamps, self.gpu_usage_samples, self.memory_samples)
+            )
 
 
 # global instance - import this in your scripts